@@ -11,18 +11,39 @@ import time
 
 from data_processing import process_transactions
 from financial_calculations import calculate_current_values
-from visualisation import display_overall_holdings, create_pie_chart, display_stock_details
+from visualisation import display_overall_holdings, create_pie_chart, display_stock_details, display_holdings_as_of
+from holdings_index import HoldingsIndex
+from benchmarks import compare_to_benchmarks
+from corporate_actions import corporate_actions, apply_split_adjustments
+from request_policy import policy
+from ingest import STORE_DIR, list_chunks
 
 st.set_page_config(page_title="Investment Portfolio", page_icon="logo.svg")
 
+# Start a fresh latency budget for this render
+policy.start_page()
+st.session_state['rendering_page'] = True
+
 # Set the title of the app
 st.title('Investment Portfolio')
 
-def load_transactions(json_file_path):
-    """Load transaction data from a JSON file."""
+@st.cache_data
+def load_ledger_chunk(chunk_path):
+    """Load one imported ledger chunk. Chunks are immutable, so each is only read once."""
+    return pd.read_parquet(chunk_path)
+
+def load_transactions(json_file_path, store_dir=STORE_DIR):
+    """Load transaction data from the JSON ledger plus any rows imported with ingest.py."""
     with open(json_file_path, 'r') as file:
         transactions_data = json.load(file)
-    return pd.DataFrame(transactions_data)
+    frames = [pd.DataFrame(transactions_data)]
+    frames += [load_ledger_chunk(str(chunk_path)) for chunk_path in list_chunks(store_dir)]
+    return pd.concat(frames, ignore_index=True)
+
+@st.cache_resource
+def build_holdings_index(transactions_df):
+    """Build the point-in-time holdings index, rebuilt only when the ledger changes."""
+    return HoldingsIndex(transactions_df)
 
 # Define the path to the JSON file
 json_file_path = Path(__file__).parent / 'data' / 'investment_data.json'
@@ -30,6 +51,10 @@ json_file_path = Path(__file__).parent / 'data' / 'investment_data.json'
 # Load transactions
 transactions_df = load_transactions(json_file_path)
 
+# Restate pre-split trades in today's share terms to match Yahoo's split-adjusted closes
+corporate_actions.refresh(transactions_df)
+transactions_df = apply_split_adjustments(transactions_df, corporate_actions.splits_frame(transactions_df))
+
 # Process transactions to get holdings and cumulative investment
 holdings, cumulative_investment, shares_held_over_time, investment_over_time, dates = process_transactions(transactions_df)
 
@@ -39,17 +64,22 @@ current_values, profit_loss_per_stock, total_current_value, total_invested_amoun
 # Display overall holdings
 display_overall_holdings(total_current_value, total_invested_amount, total_profit_loss)
 
-# Prepare holdings_df for the pie chart
+# Prepare holdings_df for the pie chart (tickers without a price were already reported above)
+priced_tickers = [ticker for ticker in holdings.keys() if ticker in current_values]
 holdings_df = pd.DataFrame({
-    'Ticker': list(holdings.keys()),
-    'Shares': list(holdings.values()),
-    'Current Value Numeric': [current_values[ticker] for ticker in holdings.keys()],
-    'Profit/Loss': [profit_loss_per_stock[ticker] for ticker in holdings.keys()]
+    'Ticker': priced_tickers,
+    'Shares': [holdings[ticker] for ticker in priced_tickers],
+    'Current Value Numeric': [current_values[ticker] for ticker in priced_tickers],
+    'Profit/Loss': [profit_loss_per_stock[ticker] for ticker in priced_tickers]
 })
 
 # Create and display the pie chart
 create_pie_chart(holdings_df)
 
+# Build the point-in-time holdings index once per ledger and show the portfolio as of a chosen date
+holdings_index = build_holdings_index(transactions_df)
+display_holdings_as_of(holdings_index)
+
 # Display your markdown text
 st.caption("Visual representation of my live stock holdings from my investment portfolio. This application is a remake of the original [Investment Portfolio Project](https://github.com/eethansmith/Investment-Portfolio-Project) I built using a React frontend and Django backend API in December 2023. Utilised yfinance to obtain live data along with investment transactions from my FreeTrade account. I wanted to recreate this project using Streamlit for ease of use and deployment whilst experimenting with more generative AI functionality.")  
 st.caption("The investment data has been extracted from my FreeTrade account spanning back to my very first trade of Apple Stock in November 2020. Each trade is stored in a JSON file and processed to display the current value of my stock portfolio live.")
@@ -75,7 +105,10 @@ def score_to_color_bar(score):
 
 # Display WAYNE AI detailed stock assessment
 
-explaination, score = display_stock_details(holdings, transactions_df)
+# Compare each holding with its benchmark over the same cash flows
+benchmark_df = compare_to_benchmarks(transactions_df, current_values, policy)
+
+explaination, score = display_stock_details(holdings, transactions_df, benchmark_df)
 
 # Define assessment based on score ranges
 if score is not None:
@@ -101,6 +134,9 @@ else:
 # Display the assessment in Streamlit
 st.markdown(f"### {assessment}")
 
-st.markdown(score_to_color_bar(score), unsafe_allow_html=True)
+if score is not None:
+    st.markdown(score_to_color_bar(score), unsafe_allow_html=True)
+
+st.caption(f"{explaination}")
 
-st.caption(f"{explaination}")
\ No newline at end of file
+st.session_state['rendering_page'] = False
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils import get_stock_category
+
+# Benchmark used for each holding category: (display name, Yahoo ticker)
+DEFAULT_BENCHMARK = ('S&P 500', '^GSPC')
+CATEGORY_BENCHMARKS = {
+    'S&P 500': DEFAULT_BENCHMARK,
+    'Tech': ('Technology Select Sector SPDR (XLK)', 'XLK'),
+    'Finance': ('Financial Select Sector SPDR (XLF)', 'XLF'),
+}
+
+
+def get_benchmark(ticker):
+    """(display name, Yahoo ticker) of the benchmark a holding is compared against."""
+    return CATEGORY_BENCHMARKS.get(get_stock_category(ticker), DEFAULT_BENCHMARK)
+
+
+def load_benchmark_closes(benchmark_tickers, start_date, policy):
+    """
+    Daily closes for each benchmark since `start_date`, in long format (Benchmark, Date, Close).
+    Closes are split-adjusted only (price return), the same basis as the holdings' own returns.
+    """
+    start = start_date.strftime('%Y-%m-%d')
+    end = datetime.now().strftime('%Y-%m-%d')
+    calls = {
+        ('history', benchmark, start, end): (policy.provider.history, (benchmark, start, end))
+        for benchmark in benchmark_tickers
+    }
+    frames = []
+    for (_, benchmark, _, _), historical_prices in policy.fetch_many(calls).items():
+        if historical_prices.empty:
+            continue
+        dates = pd.DatetimeIndex(historical_prices.index)
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        frames.append(pd.DataFrame({
+            'Benchmark': benchmark,
+            'Date': dates.normalize(),
+            'Close': historical_prices['Close'].to_numpy(dtype=float),
+        }))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def compare_to_benchmarks(transactions_df, current_values, policy):
+    """
+    Compare every holding with its benchmark over the same cash flows.
+
+    Each buy and sell is replayed as a purchase or sale of the same dollar amount
+    of the benchmark on the same date. All holdings are computed in one pass.
+
+    Both returns are money-weighted (Modified Dietz) over the window from the
+    holding's first trade to today: gain / average capital, where the gain is the
+    current value minus net cash put in, and the average capital weights each cash
+    flow by the fraction of the window it was invested for. Holding and benchmark
+    share the same denominator, so earlier profitable sales can't shrink it to
+    nothing the way dividing by net invested does.
+
+    Returns a DataFrame indexed by ticker with the net amount invested, the
+    average capital, the holding's return, the benchmark's return and the
+    excess return (in percent).
+    """
+    flows = pd.DataFrame({
+        'Ticker': transactions_df['Ticker Symbol'],
+        'Date': pd.to_datetime(transactions_df['Date'], dayfirst=True).dt.normalize(),
+        'Cash Flow': transactions_df['Transaction Valuation USD'].replace(r'[\$,]', '', regex=True).astype(float),
+    })
+    flows['Cash Flow'] *= np.where(transactions_df['Transaction Type'] == 'SELL', -1.0, 1.0)
+    flows = flows[flows['Ticker'].isin(list(current_values.keys()))]
+
+    benchmarks = {ticker: get_benchmark(ticker) for ticker in flows['Ticker'].unique()}
+    flows['Benchmark'] = flows['Ticker'].map(lambda ticker: benchmarks[ticker][1])
+    flows = flows.sort_values('Date')
+
+    closes = load_benchmark_closes(set(flows['Benchmark']), flows['Date'].min(), policy)
+    if closes.empty:
+        # No benchmark data at all; every comparison comes out as NaN
+        flows['Close'] = np.nan
+        latest_closes = pd.Series(dtype=float)
+    else:
+        closes['Date'] = closes['Date'].astype('datetime64[ns]')
+        closes = closes.sort_values('Date')
+        flows['Date'] = flows['Date'].astype('datetime64[ns]')
+
+        # Benchmark close on each trade date (nearest trading day) and the latest close
+        flows = pd.merge_asof(flows, closes, on='Date', by='Benchmark', direction='nearest')
+        latest_closes = closes.groupby('Benchmark')['Close'].last()
+    flows['Benchmark Units'] = flows['Cash Flow'] / flows['Close']
+
+    # Modified Dietz weights: share of each holding's window (first trade to today) a flow was invested for
+    today = pd.Timestamp(datetime.now()).normalize()
+    window_days = (today - flows.groupby('Ticker')['Date'].transform('min')).dt.days
+    flows['Weighted Flow'] = flows['Cash Flow'] * (today - flows['Date']).dt.days / window_days.where(window_days > 0)
+
+    summary = flows.groupby('Ticker').agg(
+        net_invested=('Cash Flow', 'sum'),
+        average_capital=('Weighted Flow', lambda flow: flow.sum(min_count=len(flow))),
+        benchmark_units=('Benchmark Units', lambda units: units.sum(min_count=len(units))),
+        benchmark=('Benchmark', 'first'),
+    )
+    summary['Benchmark Value'] = summary['benchmark_units'] * summary['benchmark'].map(latest_closes)
+    summary['Current Value'] = pd.Series(current_values, dtype=float).reindex(summary.index)
+
+    capital = summary['average_capital'].where(summary['average_capital'] > 0)
+    summary['Holding Return %'] = (summary['Current Value'] - summary['net_invested']) / capital * 100
+    summary['Benchmark Return %'] = (summary['Benchmark Value'] - summary['net_invested']) / capital * 100
+    summary['Excess Return %'] = summary['Holding Return %'] - summary['Benchmark Return %']
+    summary['Benchmark Name'] = summary.index.map(lambda ticker: benchmarks[ticker][0])
+
+    summary = summary.rename(columns={'net_invested': 'Net Invested', 'average_capital': 'Average Capital',
+                                      'benchmark': 'Benchmark'})
+    return summary[['Benchmark Name', 'Benchmark', 'Net Invested', 'Average Capital', 'Current Value',
+                    'Holding Return %', 'Benchmark Return %', 'Excess Return %']]
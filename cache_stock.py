@@ -3,7 +3,7 @@ import json
 import os
 
 # Function to fetch stock price for a single ticker and update the JSON file
-def cache_stock_price(ticker):
+def cache_stock_price(ticker, price=None):
     # Define the file path where the stock data is saved
     file_path = os.path.join(os.getcwd(), 'stock_prices.json')
 
@@ -14,15 +14,17 @@ def cache_stock_price(ticker):
     else:
         stock_data = {}
 
-    # Fetch stock data for the specified ticker
-    stock = yf.Ticker(ticker)
-    stock_info = stock.history(period="1d")
-
-    if not stock_info.empty:
+    # Fetch stock data for the specified ticker, unless the caller already has the price
+    if price is None:
+        stock = yf.Ticker(ticker)
+        stock_info = stock.history(period="1d")
+        if stock_info.empty:
+            return
         # Get the closing price for the last available day
-        stock_price = stock_info['Close'].iloc[-1]
-        stock_data[ticker] = round(stock_price, 2)  # Round price to 2 decimal places
-        
-        # Save the updated stock data back to the JSON file
-        with open(file_path, 'w') as json_file:
-            json.dump(stock_data, json_file, indent=4)
\ No newline at end of file
+        price = stock_info['Close'].iloc[-1]
+
+    stock_data[ticker] = round(float(price), 2)  # Round price to 2 decimal places
+
+    # Save the updated stock data back to the JSON file
+    with open(file_path, 'w') as json_file:
+        json.dump(stock_data, json_file, indent=4)
\ No newline at end of file
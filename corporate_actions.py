@@ -0,0 +1,215 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from request_policy import policy as default_policy
+
+ACTIONS_FILE = Path(__file__).parent / 'data' / 'corporate_actions.json'
+
+
+class CorporateActionsStore:
+    """
+    Split and dividend events per ticker, cached on disk.
+
+    Each ticker is fetched in full once (from its first trade date) and then
+    refreshed incrementally at most once a day, from the last fetch date.
+    File layout: {ticker: {"start", "fetched", "splits": {date: ratio}, "dividends": {date: amount}}}
+    with dates as 'YYYY-MM-DD'.
+    """
+
+    def __init__(self, path=ACTIONS_FILE, policy=None):
+        self.path = Path(path)
+        self.policy = policy or default_policy
+        if self.path.exists():
+            with open(self.path, 'r') as file:
+                self.actions = json.load(file)
+        else:
+            self.actions = {}
+
+    def _save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(self.actions, file, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def refresh(self, transactions_df):
+        """
+        Fetch new events for currently held tickers whose cache is out of date.
+
+        All out-of-date tickers are fetched concurrently under the page budget.
+        A ticker's entry is only replaced once its fetch has completed, so calls
+        that time out leave the previous (complete) entry in place; their late
+        results warm the policy cache for the next render.
+        """
+        first_trades = _first_trades(transactions_df)
+        held = _held_tickers(transactions_df)
+        today = datetime.now().strftime('%Y-%m-%d')
+
+        entries = {}
+        for ticker in held:
+            first_trade = first_trades[ticker]
+            entry = self.actions.get(ticker)
+            if entry is not None and entry['start'] <= first_trade and entry['fetched'] >= today:
+                continue
+            # Incremental refresh from the last fetch, or a full fetch for new tickers/earlier trades
+            if entry is None or entry['start'] > first_trade:
+                entry = {'start': first_trade, 'fetched': first_trade, 'splits': {}, 'dividends': {}}
+            entries[ticker] = entry
+
+        calls = {
+            ('actions', ticker, entry['fetched']): (self.policy.provider.actions, (ticker, entry['fetched']))
+            for ticker, entry in entries.items()
+        }
+        results = self.policy.fetch_many(calls)
+        if not results:
+            return
+
+        for (_, ticker, _), events in results.items():
+            entry = entries[ticker]
+            dates = pd.DatetimeIndex(events.index)
+            if dates.tz is not None:
+                dates = dates.tz_localize(None)
+            dates = dates.strftime('%Y-%m-%d')
+            for date, ratio in zip(dates, events['Stock Splits']):
+                if ratio > 0:
+                    entry['splits'][date] = float(ratio)
+            for date, amount in zip(dates, events['Dividends']):
+                if amount > 0:
+                    entry['dividends'][date] = float(amount)
+            entry['fetched'] = today
+            self.actions[ticker] = entry
+
+        self._save()
+
+    def _events_frame(self, kind, column):
+        rows = [
+            (ticker, date, value)
+            for ticker, entry in self.actions.items()
+            for date, value in entry[kind].items()
+        ]
+        df = pd.DataFrame(rows, columns=['Ticker', 'Date', column])
+        df['Ticker'] = df['Ticker'].astype(str)
+        df['Date'] = pd.to_datetime(df['Date']).astype('datetime64[ns]')
+        return df.sort_values(['Ticker', 'Date'], ignore_index=True)
+
+    def splits_frame(self, transactions_df=None):
+        """
+        Cached splits as (Ticker, Date, Ratio). Given a ledger, only tickers whose
+        cached events reach back to their first trade are included, so a ticker
+        that hasn't been fully fetched yet is left unadjusted rather than half-adjusted.
+        """
+        splits_df = self._events_frame('splits', 'Ratio')
+        if transactions_df is None:
+            return splits_df
+        first_trades = _first_trades(transactions_df)
+        covered = [ticker for ticker, entry in self.actions.items()
+                   if ticker in first_trades and entry['start'] <= first_trades[ticker]]
+        return splits_df[splits_df['Ticker'].isin(covered)].reset_index(drop=True)
+
+    def dividends(self, ticker):
+        """Per-share dividends for a ticker, indexed by ex-date."""
+        entry = self.actions.get(ticker, {'dividends': {}})
+        dividends = pd.Series(entry['dividends'], dtype=float)
+        dividends.index = pd.to_datetime(dividends.index)
+        return dividends.sort_index()
+
+
+def _first_trades(transactions_df):
+    dates = pd.to_datetime(transactions_df['Date'], dayfirst=True)
+    return dates.groupby(transactions_df['Ticker Symbol']).min().dt.strftime('%Y-%m-%d').to_dict()
+
+
+def _held_tickers(transactions_df):
+    sign = transactions_df['Transaction Type'].map({'BUY': 1.0, 'SELL': -1.0})
+    net = (sign * _to_float(transactions_df['No. of Shares'].astype(str))).groupby(
+        transactions_df['Ticker Symbol']).sum()
+    return list(net[net > 0.001].index)
+
+
+def _to_float(column):
+    return column.replace(r'[\$,]', '', regex=True).astype(float)
+
+
+def apply_split_adjustments(transactions_df, splits_df, tolerance=0.02):
+    """
+    Restate ledger share counts and per-share prices in today's share terms.
+
+    Every trade is matched to the first split after its date, and multiplied by
+    the cumulative ratio of that split and all later ones, in a single merge
+    across the whole ledger. Valuations and cash amounts are unchanged.
+
+    The ledger already records some splits by hand, so those are left alone:
+    - a zero-cost BUY for the ticker on the split date means the split itself is
+      in the ledger (the bonus shares), so that split is dropped;
+    - rows where shares x price matches the transaction valuation (within
+      `tolerance`) are raw trades, so both shares and prices are restated;
+    - rows where shares x price matches the valuation x factor already have
+      restated shares but pre-split prices, so only the prices are restated;
+    - anything else is kept as recorded.
+    """
+    adjusted_df = transactions_df.copy()
+    if splits_df.empty:
+        return adjusted_df
+
+    shares = _to_float(adjusted_df['No. of Shares'].astype(str))
+    price = _to_float(adjusted_df['Price per Share USD'].astype(str))
+    valuation = adjusted_df['Transaction Valuation USD'].astype(float)
+    dates = pd.to_datetime(adjusted_df['Date'], dayfirst=True).astype('datetime64[ns]')
+
+    # Splits the ledger recorded as a zero-cost BUY on the split date
+    bonus_rows = (adjusted_df['Transaction Type'] == 'BUY') & (valuation == 0)
+    recorded = set(zip(adjusted_df.loc[bonus_rows, 'Ticker Symbol'].astype(str), dates[bonus_rows]))
+    splits_df = splits_df[[(t, d) not in recorded for t, d in zip(splits_df['Ticker'], splits_df['Date'])]]
+    if splits_df.empty:
+        return adjusted_df
+
+    # Cumulative factor from each split onwards (product of it and every later split)
+    splits_df = splits_df.assign(Date=splits_df['Date'].astype('datetime64[ns]')).sort_values(['Ticker', 'Date'])
+    splits_df['Factor'] = splits_df.iloc[::-1].groupby('Ticker')['Ratio'].cumprod()
+
+    trades = pd.DataFrame({
+        'Ticker': adjusted_df['Ticker Symbol'].astype(str).to_numpy(),
+        'Date': dates.to_numpy(),
+        'Row': np.arange(len(adjusted_df)),
+    }).sort_values('Date')
+
+    # A split on the trade date is already reflected in that trade, so only later splits count
+    trades = pd.merge_asof(trades, splits_df[['Ticker', 'Date', 'Factor']].sort_values('Date'),
+                           on='Date', by='Ticker', direction='forward', allow_exact_matches=False)
+    factor = trades.sort_values('Row')['Factor'].fillna(1.0).to_numpy()
+
+    traded = (valuation > 0).to_numpy()
+    raw_trade = traded & np.isclose(shares * price, valuation, rtol=tolerance)
+    restated_shares = traded & ~raw_trade & np.isclose(shares * price, valuation * factor, rtol=tolerance)
+    share_factor = np.where(raw_trade, factor, 1.0)
+    price_factor = np.where(raw_trade | restated_shares, factor, 1.0)
+
+    adjusted_df['No. of Shares'] = shares * share_factor
+    adjusted_df['Overall Holdings'] = _to_float(adjusted_df['Overall Holdings'].astype(str)) * share_factor
+    adjusted_df['Price per Share USD'] = price / price_factor
+    adjusted_df['Average Cost per Share USD'] = _to_float(
+        adjusted_df['Average Cost per Share USD'].astype(str)) / price_factor
+    return adjusted_df
+
+
+def add_dividend_returns(historical_df, dividends):
+    """
+    Add 'Dividends Received' (cumulative) and 'Total Return Value' to a daily holdings history.
+
+    Dividends are paid on the shares held at the close before each ex-date.
+    """
+    ex_dates = historical_df['Date'].dt.normalize()
+    per_share = dividends.reindex(ex_dates).fillna(0.0).to_numpy()
+    shares_before = historical_df['Shares Held'].shift(1, fill_value=0.0).to_numpy()
+
+    historical_df['Dividends Received'] = np.cumsum(per_share * shares_before)
+    historical_df['Total Return Value'] = historical_df['Value'] + historical_df['Dividends Received']
+    return historical_df
+
+
+# Shared store for the app
+corporate_actions = CorporateActionsStore()
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+import numpy as np
+import pandas as pd
+
+
+def _floored_cumsum(values):
+    # Running total that never drops below zero, like the cumulative values in get_stock_history
+    return np.fromiter(accumulate(values, lambda total, value: max(total + value, 0.0), initial=0.0),
+                       dtype=float)[1:]
+
+
+class HoldingsIndex:
+    """
+    Point-in-time holdings built once from the ledger.
+
+    For each ticker the trade dates, cumulative shares and cumulative amount
+    invested are stored as sorted numpy arrays, so "what did I hold on date X" is a binary
+    search per ticker rather than a replay of the ledger. Daily closes can be
+    attached to value the holdings on any date.
+    """
+
+    def __init__(self, transactions_df):
+        df = pd.DataFrame({
+            'Date': pd.to_datetime(transactions_df['Date'], dayfirst=True),
+            'Time': transactions_df['Time'].fillna('00:00'),
+            'Ticker': transactions_df['Ticker Symbol'],
+            'Shares': transactions_df['No. of Shares'].astype(float),
+            'Average Cost': transactions_df['Average Cost per Share USD'].astype(float),
+            'Type': transactions_df['Transaction Type'],
+        }).sort_values(['Date', 'Time'], kind='stable')
+
+        # Amount invested is shares x average cost, as in calculate_current_values
+        sign = np.where(df['Type'] == 'SELL', -1.0, 1.0)
+        df['Shares'] *= sign
+        df['Amount Invested'] = df['Shares'] * df['Average Cost']
+
+        self._dates = {}
+        self._shares = {}
+        self._invested = {}
+        self._close_dates = {}
+        self._closes = {}
+
+        for ticker, group in df.groupby('Ticker', sort=True):
+            self._dates[ticker] = group['Date'].to_numpy(dtype='datetime64[ns]')
+            self._shares[ticker] = _floored_cumsum(group['Shares'])
+            self._invested[ticker] = group['Amount Invested'].cumsum().to_numpy()
+
+        self.tickers = list(self._dates.keys())
+        self.start_date = df['Date'].min().to_pydatetime()
+
+    def first_trade_date(self, ticker):
+        return pd.Timestamp(self._dates[ticker][0]).to_pydatetime()
+
+    def attach_closes(self, ticker, historical_prices):
+        """Attach a daily price history (a DataFrame with a 'Close' column) for a ticker."""
+        index = pd.DatetimeIndex(historical_prices.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        self._close_dates[ticker] = index.normalize().to_numpy(dtype='datetime64[ns]')
+        self._closes[ticker] = historical_prices['Close'].to_numpy(dtype=float)
+
+    def load_closes(self, policy, tickers):
+        """
+        Concurrently fetch closes for `tickers` through the policy on every call.
+
+        The index is shared across sessions for the life of the process, so it
+        doesn't decide freshness itself: the policy serves cached histories
+        instantly and refreshes stale ones in the background, and the request
+        key changes each day. Tickers that can't be fetched in time keep
+        whatever closes they had and are retried on the next call.
+        """
+        # `end` is exclusive, so ask up to tomorrow to include today's latest close
+        end = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        calls = {}
+        for ticker in tickers:
+            start = self.first_trade_date(ticker).strftime('%Y-%m-%d')
+            calls[('history', ticker, start, end)] = (policy.provider.history, (ticker, start, end))
+
+        for (_, ticker, _, _), historical_prices in policy.fetch_many(calls).items():
+            if not historical_prices.empty:
+                self.attach_closes(ticker, historical_prices)
+
+    @staticmethod
+    def _position(dates, date):
+        # Index of the last entry on or before `date`, or -1 if there is none
+        return np.searchsorted(dates, np.datetime64(pd.Timestamp(date), 'ns'), side='right') - 1
+
+    def holdings_at(self, date):
+        """Shares held and amount invested per ticker at the end of `date`."""
+        rows = []
+        for ticker in self.tickers:
+            position = self._position(self._dates[ticker], date)
+            if position < 0:
+                continue
+            shares = self._shares[ticker][position]
+            if shares > 0.001:
+                rows.append({
+                    'Ticker': ticker,
+                    'Shares': shares,
+                    'Amount Invested': self._invested[ticker][position],
+                })
+        return pd.DataFrame(rows, columns=['Ticker', 'Shares', 'Amount Invested'])
+
+    def close_at(self, ticker, date):
+        """Most recent close on or before `date`, or None if no closes are attached."""
+        if ticker not in self._closes:
+            return None
+        position = self._position(self._close_dates[ticker], date)
+        return self._closes[ticker][position] if position >= 0 else None
+
+    def valuation_at(self, date):
+        """
+        Holdings at `date` with their price, value and profit/loss on that date.
+        Price, value and profit/loss are NaN for tickers without closes.
+        """
+        holdings_df = self.holdings_at(date)
+        prices = [self.close_at(ticker, date) for ticker in holdings_df['Ticker']]
+        holdings_df['Price per Share'] = pd.Series(prices, index=holdings_df.index, dtype=float)
+        holdings_df['Value'] = holdings_df['Shares'] * holdings_df['Price per Share']
+        holdings_df['Profit/Loss'] = holdings_df['Value'] - holdings_df['Amount Invested']
+        return holdings_df
@@ -0,0 +1,375 @@
+"""
+Stream broker exports (CSV or JSON lines) into the ledger.
+
+Rows are read one at a time, normalised to the ledger schema used by
+data/investment_data.json, deduplicated against an on-disk hash index (SQLite) and
+appended to a chunked Parquet store in data/ledger/. Exports are never held in
+memory: at most CHUNK_ROWS new rows are buffered, stored chunks are replayed a
+batch at a time, and only the hand-maintained JSON ledger is read in full.
+
+Usage:
+    python ingest.py export.csv [more_exports.jsonl ...]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+from collections import defaultdict, deque
+from datetime import datetime
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATA_DIR = Path(__file__).parent / 'data'
+LEDGER_JSON = DATA_DIR / 'investment_data.json'
+STORE_DIR = DATA_DIR / 'ledger'
+
+CHUNK_ROWS = 5000  # Rows buffered before a chunk is written
+
+# Same columns and types as the hand-maintained JSON ledger
+LEDGER_SCHEMA = pa.schema([
+    ('Transaction Type', pa.string()),
+    ('Date', pa.string()),
+    ('Time', pa.string()),
+    ('Ticker Symbol', pa.string()),
+    ('No. of Shares', pa.string()),
+    ('Price per Share USD', pa.string()),
+    ('Image Filename', pa.string()),
+    ('Transaction Valuation USD', pa.float64()),
+    ('Overall Holdings', pa.float64()),
+    ('Average Cost per Share USD', pa.float64()),
+    ('Realized Gain/Loss USD', pa.float64()),
+    ('Portfolio Valuation USD', pa.float64()),
+])
+
+# Broker export column names accepted for each ledger field
+FIELD_ALIASES = {
+    'Transaction Type': ['Transaction Type', 'Buy / Sell', 'Side', 'Action', 'Type'],
+    'Date': ['Date', 'Trade Date'],
+    'Time': ['Time', 'Trade Time'],
+    'Timestamp': ['Timestamp', 'Datetime', 'Executed At'],
+    'Ticker Symbol': ['Ticker Symbol', 'Ticker', 'Symbol'],
+    'No. of Shares': ['No. of Shares', 'Quantity', 'Shares'],
+    'Price per Share USD': ['Price per Share USD', 'Price per Share in Account Currency', 'Price per Share', 'Price'],
+    'Transaction Valuation USD': ['Transaction Valuation USD', 'Total Amount', 'Amount'],
+}
+
+DATE_FORMATS = ['%d-%m-%Y', '%Y-%m-%d', '%d/%m/%Y']
+TIME_FORMATS = ['%H:%M', '%H:%M:%S', '%I:%M %p', '%I:%M:%S %p']
+
+
+class IngestError(ValueError):
+    """Raised when an export row cannot be mapped to the ledger schema."""
+
+
+def _to_float(value):
+    if isinstance(value, str):
+        value = value.replace('$', '').replace(',', '').strip()
+    return float(value)
+
+
+def _field(raw, name):
+    for alias in FIELD_ALIASES[name]:
+        value = raw.get(alias)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _normalize_time(time_str):
+    """Reformat a trade time as the ledger's zero-padded 'HH:MM'."""
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(time_str.strip(), fmt).strftime('%H:%M')
+        except ValueError:
+            continue
+    raise IngestError(f"Unrecognised time format: {time_str}")
+
+
+def _trade_time(row):
+    """Sortable 'YYYY-MM-DD HH:MM' for a ledger row."""
+    date = datetime.strptime(row['Date'], '%d-%m-%Y').strftime('%Y-%m-%d')
+    return f"{date} {_normalize_time(row['Time'])}"
+
+
+def _parse_date_time(raw):
+    """Return the ledger's ('dd-mm-YYYY', 'HH:MM') pair for an export row."""
+    timestamp = _field(raw, 'Timestamp')
+    if timestamp:
+        parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        return parsed.strftime('%d-%m-%Y'), parsed.strftime('%H:%M')
+
+    date_str = _field(raw, 'Date')
+    if not date_str:
+        raise IngestError(f"Row has no date: {raw}")
+    for fmt in DATE_FORMATS:
+        try:
+            date = datetime.strptime(date_str.strip(), fmt)
+            break
+        except ValueError:
+            continue
+    else:
+        raise IngestError(f"Unrecognised date format: {date_str}")
+    return date.strftime('%d-%m-%Y'), _normalize_time(_field(raw, 'Time') or '00:00')
+
+
+def normalize_row(raw):
+    """Map a raw export row to the trade fields of the ledger schema, or None for non-trade rows."""
+    transaction_type = (_field(raw, 'Transaction Type') or '').strip().upper()
+    if transaction_type not in ('BUY', 'SELL'):
+        # Deposits, dividends, fees etc. aren't part of the trade ledger
+        return None
+
+    ticker = _field(raw, 'Ticker Symbol')
+    shares = _field(raw, 'No. of Shares')
+    price = _field(raw, 'Price per Share USD')
+    if ticker is None or shares is None or price is None:
+        raise IngestError(f"Row is missing ticker, shares or price: {raw}")
+
+    date, time = _parse_date_time(raw)
+    shares = abs(_to_float(shares))
+    price = _to_float(price)
+    valuation = _field(raw, 'Transaction Valuation USD')
+    valuation = abs(_to_float(valuation)) if valuation is not None else shares * price
+
+    return {
+        'Transaction Type': transaction_type,
+        'Date': date,
+        'Time': time,
+        'Ticker Symbol': ticker.strip().upper(),
+        'No. of Shares': f"{shares:.8f}".rstrip('0').rstrip('.'),
+        'Price per Share USD': f"${price:,.2f}",
+        'Image Filename': None,
+        'Transaction Valuation USD': valuation,
+    }
+
+
+def row_key(row):
+    """Hash of (date, time, ticker, shares, price) identifying a trade."""
+    key = '|'.join([
+        row['Date'],
+        _normalize_time(row['Time']),
+        row['Ticker Symbol'],
+        f"{_to_float(row['No. of Shares']):.8f}",
+        f"{_to_float(row['Price per Share USD']):.2f}",
+    ])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def iter_export_rows(path):
+    """Yield raw rows from a CSV or JSON-lines export without loading the whole file."""
+    path = Path(path)
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        if path.suffix.lower() in ('.jsonl', '.ndjson'):
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+def list_chunks(store_dir=STORE_DIR):
+    """Chunk files in write order. Chunks are never rewritten once written."""
+    return sorted(Path(store_dir).glob('chunk-*.parquet'))
+
+
+class DedupIndex:
+    """Row hashes in an SQLite table, so lookups don't need every key in memory."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS keys (hash TEXT PRIMARY KEY) WITHOUT ROWID')
+
+        # One-off import of the old append-only text index
+        legacy_path = self.path.with_name('index.txt')
+        if legacy_path.exists():
+            with open(legacy_path, 'r') as file:
+                self.add_all(line.strip() for line in file if line.strip())
+            legacy_path.unlink()
+
+    def __contains__(self, key):
+        return self.db.execute('SELECT 1 FROM keys WHERE hash = ?', (key,)).fetchone() is not None
+
+    def add_all(self, keys):
+        with self.db:
+            self.db.executemany('INSERT OR IGNORE INTO keys VALUES (?)', ((key,) for key in keys))
+
+
+class LedgerStore:
+    """
+    Chunked Parquet store for ingested ledger rows.
+
+    Alongside the chunks it keeps the dedup index and the running per-ticker
+    state (holdings, average cost, latest trade) needed to fill the ledger's
+    derived columns, so appending never has to re-read earlier rows.
+
+    The derived columns depend on trade order, so rows older than the latest
+    trade already stored for their ticker are rejected rather than appended.
+    """
+
+    def __init__(self, store_dir=STORE_DIR, ledger_json=LEDGER_JSON):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path = self.store_dir / 'state.json'
+        self.index = DedupIndex(self.store_dir / 'index.sqlite')
+
+        if self.state_path.exists():
+            with open(self.state_path, 'r') as file:
+                self.state = json.load(file)
+            self.state.setdefault('last_trades', {})
+        else:
+            self.state = self._empty_state()
+
+        if Path(ledger_json).exists():
+            self._sync_json(ledger_json)
+
+    @staticmethod
+    def _empty_state():
+        return {'holdings': {}, 'average_costs': {}, 'last_trades': {}, 'portfolio_valuation': 0.0}
+
+    def _sync_json(self, ledger_json):
+        """
+        Index trades in the hand-maintained ledger so they are not imported twice.
+
+        Runs on every open so rows added to the JSON by hand are picked up. When
+        there are any, the running state is rebuilt by merging the JSON rows into
+        the stored chunks in trade order, since the new rows may predate stored ones.
+        """
+        with open(ledger_json, 'r') as file:
+            json_rows = json.load(file)
+        new_keys = [key for key in map(row_key, json_rows) if key not in self.index]
+        if not new_keys:
+            return
+
+        self.state = self._empty_state()
+        for row in self._merged_rows(json_rows):
+            self._apply(row)
+        self.index.add_all(new_keys)
+        self._save_state()
+
+    def _merged_rows(self, json_rows, batch_rows=CHUNK_ROWS):
+        """
+        Yield the JSON rows and every stored row in per-ticker trade order, which is
+        all the derived columns depend on. Stored rows are already in trade order per
+        ticker (older rows are rejected on ingest), so chunks are streamed a batch at
+        a time and each JSON row is slotted in before the first later stored trade.
+        """
+        columns = ['Transaction Type', 'Date', 'Time', 'Ticker Symbol', 'No. of Shares', 'Price per Share USD']
+        pending = defaultdict(deque)
+        for row in sorted(json_rows, key=_trade_time):
+            pending[row['Ticker Symbol']].append({column: row[column] for column in columns})
+
+        for chunk_path in list_chunks(self.store_dir):
+            for batch in pq.ParquetFile(chunk_path).iter_batches(batch_size=batch_rows, columns=columns):
+                for row in batch.to_pylist():
+                    earlier = pending[row['Ticker Symbol']]
+                    trade_time = _trade_time(row)
+                    while earlier and _trade_time(earlier[0]) <= trade_time:
+                        yield earlier.popleft()
+                    yield row
+
+        for rows in pending.values():
+            yield from rows
+
+    def _apply(self, row):
+        """Update running state with a trade and fill in the ledger's derived columns."""
+        ticker = row['Ticker Symbol']
+        shares = _to_float(row['No. of Shares'])
+        price = _to_float(row['Price per Share USD'])
+        held = self.state['holdings'].get(ticker, 0.0)
+        avg_cost = self.state['average_costs'].get(ticker, 0.0)
+        realized = 0.0
+
+        if row['Transaction Type'] == 'BUY':
+            avg_cost = (held * avg_cost + shares * price) / (held + shares)
+            held += shares
+            self.state['portfolio_valuation'] += shares * price
+        else:
+            realized = (price - avg_cost) * shares
+            held = max(held - shares, 0.0)
+            self.state['portfolio_valuation'] = max(self.state['portfolio_valuation'] - shares * avg_cost, 0.0)
+
+        self.state['holdings'][ticker] = held
+        self.state['average_costs'][ticker] = avg_cost
+        self.state['last_trades'][ticker] = _trade_time(row)
+        row['Overall Holdings'] = held
+        row['Average Cost per Share USD'] = avg_cost
+        row['Realized Gain/Loss USD'] = realized
+        row['Portfolio Valuation USD'] = self.state['portfolio_valuation']
+        return row
+
+    def _save_state(self):
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(self.state, file, indent=4)
+        os.replace(tmp_path, self.state_path)
+
+    def _write_chunk(self, rows, keys):
+        existing = list_chunks(self.store_dir)
+        next_id = int(existing[-1].stem.split('-')[1]) + 1 if existing else 1
+        path = self.store_dir / f"chunk-{next_id:06d}.parquet"
+        tmp_path = path.with_suffix('.tmp')
+        pq.write_table(pa.Table.from_pylist(rows, schema=LEDGER_SCHEMA), tmp_path)
+        os.replace(tmp_path, path)
+        self.index.add_all(keys)
+        self._save_state()
+        return path
+
+    def ingest(self, raw_rows, chunk_rows=CHUNK_ROWS):
+        """
+        Append new rows from an iterable of raw export rows.
+        Returns (added, skipped, rejected): skipped rows are duplicates or non-trades,
+        rejected rows are older than a trade already stored for the same ticker.
+        """
+        buffer, keys = [], []
+        pending = set()  # Keys buffered but not yet flushed to the index
+        added = skipped = rejected = 0
+
+        for raw in raw_rows:
+            row = normalize_row(raw)
+            if row is None:
+                skipped += 1
+                continue
+            key = row_key(row)
+            if key in self.index or key in pending:
+                skipped += 1
+                continue
+            if _trade_time(row) < self.state['last_trades'].get(row['Ticker Symbol'], ''):
+                rejected += 1
+                continue
+            buffer.append(self._apply(row))
+            keys.append(key)
+            pending.add(key)
+            added += 1
+            if len(buffer) >= chunk_rows:
+                self._write_chunk(buffer, keys)
+                buffer, keys, pending = [], [], set()
+
+        if buffer:
+            self._write_chunk(buffer, keys)
+        return added, skipped, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import broker exports into the investment ledger.")
+    parser.add_argument('exports', nargs='+', help="CSV or JSON-lines broker export files")
+    parser.add_argument('--store', default=str(STORE_DIR), help="Directory of the chunked ledger store")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Rows per Parquet chunk")
+    args = parser.parse_args()
+
+    store = LedgerStore(args.store)
+    for export in args.exports:
+        added, skipped, rejected = store.ingest(iter_export_rows(export), chunk_rows=args.chunk_rows)
+        print(f"{export}: added {added} rows, skipped {skipped} duplicate or non-trade rows")
+        if rejected:
+            print(f"{export}: rejected {rejected} rows older than trades already in the ledger; "
+                  "add them to data/investment_data.json by hand instead")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
 import streamlit as st  
+import pandas as pd
 from wayne_ai import score_investment
 
-def prepare_investment_data_for_prompt(historical_df, ticker):
+def prepare_investment_data_for_prompt(historical_df, ticker, benchmark=None):
     if historical_df.empty:
         st.error("No historical data available to process.")
         return None
@@ -41,6 +42,17 @@ def prepare_investment_data_for_prompt(historical_df, ticker):
             "Shares Held": f"{total_shares_held:.2f} shares",
             "Total Value Invested": f"${total_value_paid:.2f}",
         }
+
+        # Dividends paid on the position, if any
+        if 'Dividends Received' in historical_df and historical_df['Dividends Received'].iloc[-1] > 0:
+            investment_data["Dividends Received"] = f"${historical_df['Dividends Received'].iloc[-1]:.2f}"
+
+        # Benchmark return over the same cash flows, if it could be computed
+        if benchmark is not None and not pd.isna(benchmark['Excess Return %']):
+            investment_data["Benchmark"] = benchmark['Benchmark Name']
+            investment_data["Benchmark Return Over Same Cash Flows"] = f"{benchmark['Benchmark Return %']:.2f}%"
+            investment_data["Excess Return vs Benchmark"] = f"{benchmark['Excess Return %']:.2f}%"
+
         # Process data (e.g., scoring) and return result
         scoring_result = score_investment(investment_data)
         return scoring_result
@@ -0,0 +1,317 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+import pandas as pd
+import yfinance as yf
+
+# Default latency settings (seconds)
+CALL_TIMEOUT = 3.0        # Longest we wait on any single upstream call
+PAGE_BUDGET = 10.0        # Total time a page render may spend waiting on upstream
+FRESH_FOR = 300.0         # Cached values younger than this are served without a refresh
+FAILURE_THRESHOLD = 3     # Consecutive failures before the circuit opens
+RESET_AFTER = 60.0        # How long the circuit stays open before a trial call
+MAX_WORKERS = 32          # Enough to fetch every holding in a single batch
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when a value could not be fetched in time and there is nothing to fall back to."""
+
+
+class YahooProvider:
+    """Thin wrapper around the yfinance calls the app makes."""
+
+    def last_close(self, ticker):
+        # Raises IndexError when Yahoo has no data for the ticker
+        return float(yf.Ticker(ticker).history(period="1d")['Close'].iloc[-1])
+
+    def history(self, ticker, start, end):
+        # Closes adjusted for splits only; dividends are added separately by corporate_actions
+        return yf.Ticker(ticker).history(start=start, end=end, auto_adjust=False)
+
+    def actions(self, ticker, start):
+        history = yf.Ticker(ticker).history(start=start, actions=True, auto_adjust=False)
+        return history[['Dividends', 'Stock Splits']]
+
+    def long_name(self, ticker):
+        info = yf.Ticker(ticker).info
+        if info and 'longName' in info:
+            return info['longName']
+        return ticker
+
+
+class FakeProvider:
+    """Local stand-in for Yahoo that injects latency and failures, for exercising the policy offline."""
+
+    def __init__(self, prices=None, actions=None, latency=0.0, fail=False):
+        self.prices = prices or {}
+        self.actions_by_ticker = actions or {}
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def _respond(self):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise ConnectionError("Fake upstream failure")
+
+    def last_close(self, ticker):
+        self._respond()
+        return float(self.prices[ticker])
+
+    def history(self, ticker, start, end):
+        self._respond()
+        dates = pd.date_range(start=start, end=end, freq='B', inclusive='left')
+        return pd.DataFrame({'Close': float(self.prices[ticker])}, index=dates)
+
+    def actions(self, ticker, start):
+        self._respond()
+        events = self.actions_by_ticker.get(ticker)
+        if events is None:
+            return pd.DataFrame({'Dividends': [], 'Stock Splits': []}, index=pd.DatetimeIndex([]))
+        return events[events.index >= pd.Timestamp(start, tz=events.index.tz)]
+
+    def long_name(self, ticker):
+        self._respond()
+        return ticker
+
+
+class CircuitBreaker:
+    """Stops calling the upstream after repeated failures, then lets a single trial call through."""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_after=RESET_AFTER):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_after:
+                # Half-open: allow one trial and hold the circuit open for everyone else
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class PageBudget:
+    """Overall time allowance for one page render."""
+
+    def __init__(self, seconds):
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+
+class RequestPolicy:
+    """
+    Wraps upstream calls with per-call deadlines, a page budget and a circuit breaker.
+
+    Successful results are cached in memory. Once a cached value is older than
+    `fresh_for` it is still returned immediately, and a refresh is started in the
+    background (stale-while-revalidate).
+
+    The page budget is kept per thread. Streamlit runs each session's script in
+    its own thread, so one session's render can't reset another's budget.
+    """
+
+    def __init__(self, provider=None, call_timeout=CALL_TIMEOUT, page_budget=PAGE_BUDGET,
+                 fresh_for=FRESH_FOR, breaker=None, max_workers=MAX_WORKERS):
+        self.provider = provider or YahooProvider()
+        self.call_timeout = call_timeout
+        self.page_budget = page_budget
+        self.fresh_for = fresh_for
+        self.breaker = breaker or CircuitBreaker()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._cache = {}  # key -> (value, fetched_at)
+        self._in_flight = {}  # key -> future
+        self._lock = threading.Lock()
+
+    def start_page(self, seconds=None):
+        """Reset the calling thread's page budget at the start of a render."""
+        self._local.budget = PageBudget(seconds if seconds is not None else self.page_budget)
+
+    @property
+    def budget(self):
+        if getattr(self._local, 'budget', None) is None:
+            self.start_page()
+        return self._local.budget
+
+    def cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+        return entry[0] if entry is not None else None
+
+    def _record_timeout(self, future, timeout):
+        # Only count calls that actually spent most of the wait talking to the upstream.
+        # Calls still queued behind busy workers (or only just started) haven't had a
+        # fair chance, so they record their own outcome when they finish instead.
+        started = getattr(future, 'started', None)
+        if started and time.monotonic() - started[0] >= timeout / 2:
+            self._record_outcome(future, False)
+
+    def _record_outcome(self, future, success):
+        # Each call counts once on the breaker: as a failure if a caller gives up
+        # waiting on it first, otherwise as its own result when it completes
+        with self._lock:
+            if getattr(future, 'outcome_recorded', False):
+                return
+            future.outcome_recorded = True
+        if success:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    def _store(self, key, future):
+        # Done-callback for every upstream call, so late results still warm the cache
+        with self._lock:
+            self._in_flight.pop(key, None)
+        try:
+            value = future.result()
+        except LookupError:
+            # Missing data for a ticker says nothing about upstream health
+            self._record_outcome(future, True)
+            return
+        except Exception:
+            self._record_outcome(future, False)
+            return
+        self._record_outcome(future, True)
+        with self._lock:
+            self._cache[key] = (value, time.monotonic())
+
+    def _submit(self, key, fn, args):
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            started = []
+
+            def run():
+                started.append(time.monotonic())
+                return fn(*args)
+
+            future = self._executor.submit(run)
+            future.started = started
+            self._in_flight[key] = future
+        # Outside the lock: the callback runs immediately if the call has already finished
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _lookup(self, key, fn, args):
+        """Return (value, None) for a cache hit, or (None, future) when we have to wait."""
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            if time.monotonic() - fetched_at > self.fresh_for and self.breaker.allow():
+                self._submit(key, fn, args)
+            return value, None
+        if not self.breaker.allow() or self.budget.remaining() <= 0:
+            return None, None
+        return None, self._submit(key, fn, args)
+
+    def fetch(self, key, fn, *args, fallback=None):
+        """
+        Fetch `fn(*args)` under the policy. On timeout, failure or an open circuit,
+        return `fallback`, or raise UpstreamUnavailable if no fallback was given.
+        """
+        value, future = self._lookup(key, fn, args)
+        if future is None:
+            return self._fallback(key, value, fallback)
+
+        timeout = min(self.call_timeout, self.budget.remaining())
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            self._record_timeout(future, timeout)
+            return self._fallback(key, None, fallback)
+        except Exception:
+            return self._fallback(key, None, fallback)
+
+    def fetch_many(self, calls, fallbacks=None):
+        """
+        Fetch several values concurrently under a single deadline.
+        `calls` maps key -> (fn, args). Returns key -> value, with `fallbacks[key]`
+        (or no entry) for keys that could not be fetched in time.
+        """
+        fallbacks = fallbacks or {}
+        results = {}
+        pending = {}
+        for key, (fn, args) in calls.items():
+            value, future = self._lookup(key, fn, args)
+            if future is None:
+                if value is not None:
+                    results[key] = value
+                elif key in fallbacks:
+                    results[key] = fallbacks[key]
+            else:
+                pending[key] = future
+
+        if pending:
+            timeout = min(self.call_timeout, self.budget.remaining())
+            _, not_done = wait(pending.values(), timeout=timeout)
+            for future in not_done:
+                self._record_timeout(future, timeout)
+            for key, future in pending.items():
+                if future.done() and future.exception() is None:
+                    results[key] = future.result()
+                elif key in fallbacks:
+                    results[key] = fallbacks[key]
+        return results
+
+    def _fallback(self, key, value, fallback):
+        if value is not None:
+            return value
+        if fallback is not None:
+            return fallback
+        raise UpstreamUnavailable(f"No data available for {key}")
+
+    # Convenience wrappers around the provider
+    def last_close(self, ticker, fallback=None):
+        return self.fetch(('close', ticker), self.provider.last_close, ticker, fallback=fallback)
+
+    def history(self, ticker, start, end, fallback=None):
+        return self.fetch(('history', ticker, start, end), self.provider.history, ticker, start, end,
+                          fallback=fallback)
+
+    def actions(self, ticker, start):
+        return self.fetch(('actions', ticker, start), self.provider.actions, ticker, start)
+
+    def long_name(self, ticker):
+        return self.fetch(('name', ticker), self.provider.long_name, ticker, fallback=ticker)
+
+    def long_names(self, tickers):
+        calls = {('name', t): (self.provider.long_name, (t,)) for t in tickers}
+        results = self.fetch_many(calls, {('name', t): t for t in tickers})
+        return {key[1]: value for key, value in results.items()}
+
+    def last_closes(self, tickers, fallbacks=None):
+        calls = {('close', t): (self.provider.last_close, (t,)) for t in tickers}
+        fallbacks = {('close', t): v for t, v in (fallbacks or {}).items()}
+        results = self.fetch_many(calls, fallbacks)
+        return {key[1]: value for key, value in results.items()}
+
+
+# Shared policy for the app; Streamlit reruns app.py but keeps imported modules alive
+policy = RequestPolicy()
@@ -1,11 +1,12 @@
 import streamlit as st  
 import pandas as pd  
-import yfinance as yf  
 from datetime import datetime  
 
 from prepare_data import prepare_investment_data_for_prompt
+from request_policy import policy, UpstreamUnavailable
+from corporate_actions import corporate_actions, add_dividend_returns
 
-def get_stock_history(ticker, transactions_data):
+def get_stock_history(ticker, transactions_data, benchmark=None):
     if not ticker:
         st.error("Ticker symbol is required.")
         return None
@@ -25,9 +26,10 @@ def get_stock_history(ticker, transactions_data):
         if isinstance(t['Date'], str):
             t['Date'] = datetime.strptime(t['Date'], '%d-%m-%Y')
 
-        # Remove '$' and commas from 'Price per Share USD' and convert to float
-        price_str = t['Price per Share USD'].replace('$', '').replace(',', '').strip()
-        t['Price per Share USD'] = float(price_str)
+        # Remove '$' and commas from 'Price per Share USD' and convert to float (already a float once split-adjusted)
+        if isinstance(t['Price per Share USD'], str):
+            price_str = t['Price per Share USD'].replace('$', '').replace(',', '').strip()
+            t['Price per Share USD'] = float(price_str)
 
         # Convert 'No. of Shares' to float
         t['No. of Shares'] = float(t['No. of Shares'])
@@ -44,10 +46,9 @@ def get_stock_history(ticker, transactions_data):
     start_date = transactions[0]["Date"]
     end_date = datetime.now()
 
-    stock = yf.Ticker(ticker)
     try:
-        historical_prices = stock.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
-    except Exception as e:
+        historical_prices = policy.history(ticker, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+    except UpstreamUnavailable as e:
         st.error(f"Error fetching historical prices for {ticker}: {e}")
         return None
 
@@ -145,6 +146,9 @@ def get_stock_history(ticker, transactions_data):
     historical_df = pd.DataFrame(historical_values)
     historical_df = historical_df.sort_values('Date')
 
-    investment_data = prepare_investment_data_for_prompt(historical_df, ticker)
+    # Add dividends paid on the shares held for a total-return series
+    historical_df = add_dividend_returns(historical_df, corporate_actions.dividends(ticker))
+
+    investment_data = prepare_investment_data_for_prompt(historical_df, ticker, benchmark)
 
     return historical_df, investment_data
\ No newline at end of file
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import compare_to_benchmarks
+from request_policy import FakeProvider, RequestPolicy
+
+DATES = pd.date_range('2024-01-01', datetime.now() + timedelta(days=1), freq='B')
+
+
+class PathProvider(FakeProvider):
+    """FakeProvider whose histories follow a given daily price path per ticker."""
+
+    def history(self, ticker, start, end):
+        self._respond()
+        path = self.prices[ticker]
+        return path[(path.index >= start) & (path.index < end)].to_frame('Close')
+
+
+def step_path(before, after, step_date='2024-03-01'):
+    return pd.Series(np.where(DATES < step_date, before, after), index=DATES, dtype=float)
+
+
+def trade(date, ticker, side, valuation):
+    return {'Date': date, 'Ticker Symbol': ticker, 'Transaction Type': side, 'Transaction Valuation USD': valuation}
+
+
+def compare(trades, current_values, prices):
+    policy = RequestPolicy(provider=PathProvider(prices=prices), call_timeout=1.0)
+    return compare_to_benchmarks(pd.DataFrame(trades), current_values, policy)
+
+
+def test_same_price_path_has_no_excess_return():
+    # AAPL and its benchmark both go 100 -> 150: buy 10 shares, sell 5 after the gain
+    path = step_path(100.0, 150.0)
+    summary = compare(
+        [trade('02-01-2024', 'AAPL', 'BUY', 1000.0), trade('03-06-2024', 'AAPL', 'SELL', 750.0)],
+        {'AAPL': 5 * 150.0},
+        {'XLK': path},
+    )
+    row = summary.loc['AAPL']
+
+    assert row['Benchmark'] == 'XLK'
+    assert row['Net Invested'] == pytest.approx(250.0)
+    assert row['Benchmark Return %'] == pytest.approx(row['Holding Return %'])
+    assert row['Excess Return %'] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_sell_after_gain_uses_average_capital_not_net_invested():
+    path = step_path(100.0, 150.0)
+    summary = compare(
+        [trade('02-01-2024', 'AAPL', 'BUY', 1000.0), trade('03-06-2024', 'AAPL', 'SELL', 750.0)],
+        {'AAPL': 750.0},
+        {'XLK': path},
+    )
+    row = summary.loc['AAPL']
+
+    # $500 gain; $1000 was in for the whole window and $750 came out part way through
+    assert 250.0 < row['Average Capital'] < 1000.0
+    assert row['Holding Return %'] == pytest.approx(500.0 / row['Average Capital'] * 100)
+    # Dividing by the $250 left in would report 200%
+    assert row['Holding Return %'] < 200.0
+
+
+def test_holding_that_beat_a_flat_benchmark_has_positive_excess():
+    summary = compare(
+        [trade('02-01-2024', 'AAPL', 'BUY', 1000.0)],
+        {'AAPL': 2000.0},
+        {'XLK': step_path(100.0, 100.0)},
+    )
+    row = summary.loc['AAPL']
+
+    assert row['Benchmark Return %'] == pytest.approx(0.0)
+    assert row['Holding Return %'] == pytest.approx(100.0)
+    assert row['Excess Return %'] == pytest.approx(100.0)
+
+
+def test_missing_benchmark_data_is_nan():
+    summary = compare([trade('02-01-2024', 'AAPL', 'BUY', 1000.0)], {'AAPL': 1200.0}, {})
+
+    assert summary.loc['AAPL', 'Holding Return %'] == pytest.approx(20.0)
+    assert np.isnan(summary.loc['AAPL', 'Benchmark Return %'])
+    assert np.isnan(summary.loc['AAPL', 'Excess Return %'])
+
+
+def test_position_opened_today_has_no_return():
+    today = datetime.now().strftime('%d-%m-%Y')
+    summary = compare([trade(today, 'AAPL', 'BUY', 1000.0)], {'AAPL': 1000.0}, {'XLK': step_path(100.0, 100.0)})
+
+    assert np.isnan(summary.loc['AAPL', 'Holding Return %'])
+    assert np.isnan(summary.loc['AAPL', 'Excess Return %'])
+
+
+def test_only_currently_held_tickers_are_compared():
+    summary = compare(
+        [trade('02-01-2024', 'AAPL', 'BUY', 1000.0), trade('02-01-2024', 'BLK', 'BUY', 500.0),
+         trade('01-02-2024', 'BLK', 'SELL', 500.0)],
+        {'AAPL': 1000.0},
+        {'XLK': step_path(100.0, 100.0), 'XLF': step_path(100.0, 100.0)},
+    )
+
+    assert list(summary.index) == ['AAPL']
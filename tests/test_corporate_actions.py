@@ -0,0 +1,78 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from corporate_actions import CorporateActionsStore, apply_split_adjustments
+from data_processing import process_transactions
+from holdings_index import HoldingsIndex
+from request_policy import FakeProvider, RequestPolicy
+
+LEDGER_JSON = Path(__file__).parent.parent / 'data' / 'investment_data.json'
+
+# Real splits for tickers in the ledger
+SPLITS = pd.DataFrame({
+    'Ticker': ['TSLA', 'NVDA'],
+    'Date': pd.to_datetime(['2022-08-25', '2024-06-10']),
+    'Ratio': [3.0, 10.0],
+})
+
+
+@pytest.fixture
+def transactions_df():
+    with open(LEDGER_JSON, 'r') as file:
+        return pd.DataFrame(json.load(file))
+
+
+def test_splits_already_in_the_ledger_are_not_applied_again(transactions_df):
+    before, *_ = process_transactions(transactions_df.copy())
+    after, *_ = process_transactions(apply_split_adjustments(transactions_df, SPLITS))
+
+    # TSLA's split is a zero-cost BUY in the ledger and the position was closed afterwards
+    assert 'TSLA' not in after
+    # NVDA's share count was already restated after its split
+    assert after['NVDA'] == pytest.approx(before['NVDA']) == pytest.approx(1.4730864)
+    assert after == pytest.approx(before)
+
+    # ...but its price was not, so the amount invested comes back to the $62.78 actually paid
+    adjusted_df = apply_split_adjustments(transactions_df, SPLITS)
+    holdings_df = HoldingsIndex(adjusted_df).holdings_at(datetime.now()).set_index('Ticker')
+    assert holdings_df.loc['NVDA', 'Amount Invested'] == pytest.approx(62.78, abs=0.01)
+
+
+def test_raw_pre_split_trades_are_restated():
+    trades = pd.DataFrame([{
+        'Transaction Type': 'BUY', 'Date': '01-03-2024', 'Time': '10:00', 'Ticker Symbol': 'NVDA',
+        'No. of Shares': '1', 'Price per Share USD': '$800.00', 'Transaction Valuation USD': 800.0,
+        'Overall Holdings': 1.0, 'Average Cost per Share USD': 800.0,
+    }])
+
+    adjusted = apply_split_adjustments(trades, SPLITS)
+    assert adjusted['No. of Shares'].iloc[0] == pytest.approx(10)
+    assert adjusted['Price per Share USD'].iloc[0] == pytest.approx(80)
+
+
+def test_refresh_fetches_only_held_tickers_concurrently(tmp_path, transactions_df):
+    provider = FakeProvider(latency=0.1)
+    store = CorporateActionsStore(tmp_path / 'corporate_actions.json',
+                                  RequestPolicy(provider=provider, call_timeout=1.0))
+    held, *_ = process_transactions(transactions_df.copy())
+
+    store.refresh(transactions_df)
+    assert provider.calls == len(held)
+    assert set(store.actions) == set(held)
+
+    # Already fetched today, so nothing more to do
+    store.refresh(transactions_df)
+    assert provider.calls == len(held)
+
+
+def test_timed_out_tickers_are_left_unadjusted(tmp_path, transactions_df):
+    store = CorporateActionsStore(tmp_path / 'corporate_actions.json',
+                                  RequestPolicy(provider=FakeProvider(latency=0.3), call_timeout=0.05))
+
+    store.refresh(transactions_df)
+    assert store.actions == {}
+    assert store.splits_frame(transactions_df).empty
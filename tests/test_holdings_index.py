@@ -0,0 +1,80 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from data_processing import process_transactions
+from holdings_index import HoldingsIndex
+from request_policy import FakeProvider, RequestPolicy
+
+LEDGER_JSON = Path(__file__).parent.parent / 'data' / 'investment_data.json'
+
+
+@pytest.fixture
+def transactions_df():
+    with open(LEDGER_JSON, 'r') as file:
+        return pd.DataFrame(json.load(file))
+
+
+def test_holdings_today_match_process_transactions(transactions_df):
+    holdings, *_ = process_transactions(transactions_df.copy())
+    holdings_df = HoldingsIndex(transactions_df).holdings_at(datetime.now())
+
+    assert dict(zip(holdings_df['Ticker'], holdings_df['Shares'])) == pytest.approx(holdings)
+
+
+def test_amount_invested_today_matches_overall_holdings(transactions_df):
+    # Same definition as calculate_current_values: +/- shares x average cost per trade
+    sign = transactions_df['Transaction Type'].map({'BUY': 1.0, 'SELL': -1.0})
+    invested = (sign * transactions_df['No. of Shares'].astype(float)
+                * transactions_df['Average Cost per Share USD']).groupby(transactions_df['Ticker Symbol']).sum()
+
+    holdings_df = HoldingsIndex(transactions_df).holdings_at(datetime.now())
+    expected = invested[holdings_df['Ticker']].sum()
+    assert holdings_df['Amount Invested'].sum() == pytest.approx(expected)
+
+
+def test_holdings_before_first_trade_are_empty(transactions_df):
+    assert HoldingsIndex(transactions_df).holdings_at('2019-01-01').empty
+
+
+def test_load_closes_fetches_only_requested_tickers(transactions_df):
+    index = HoldingsIndex(transactions_df)
+    held = index.holdings_at(datetime.now())['Ticker']
+    provider = FakeProvider(prices={ticker: 10.0 for ticker in index.tickers}, latency=0.05)
+    policy = RequestPolicy(provider=provider, call_timeout=1.0)
+
+    index.load_closes(policy, held)
+    assert provider.calls == len(held)
+
+    valuation_df = index.valuation_at(datetime.now())
+    assert not valuation_df['Price per Share'].isna().any()
+
+
+def test_unpriced_holdings_are_nan(transactions_df):
+    valuation_df = HoldingsIndex(transactions_df).valuation_at(datetime.now())
+    assert valuation_df['Value'].isna().all()
+
+
+def test_load_closes_picks_up_refreshed_prices(transactions_df):
+    import time
+
+    index = HoldingsIndex(transactions_df)
+    held = index.holdings_at(datetime.now())['Ticker']
+    provider = FakeProvider(prices={ticker: 10.0 for ticker in index.tickers})
+    policy = RequestPolicy(provider=provider, call_timeout=1.0, fresh_for=0.05)
+
+    index.load_closes(policy, held)
+    provider.prices = {ticker: 20.0 for ticker in index.tickers}
+    time.sleep(0.1)
+
+    # The stale closes are served while the refresh runs in the background...
+    index.load_closes(policy, held)
+    deadline = time.monotonic() + 2.0
+    while index.valuation_at(datetime.now())['Price per Share'].iloc[0] != 20.0:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+        # ...and the next render picks up the refreshed ones
+        index.load_closes(policy, held)
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from ingest import LedgerStore, list_chunks, normalize_row, row_key
+
+
+def trade(date, time, ticker, side, shares, price):
+    return {'Date': date, 'Time': time, 'Ticker': ticker, 'Side': side, 'Quantity': shares, 'Price': price}
+
+
+@pytest.fixture
+def ledger_json(tmp_path):
+    path = tmp_path / 'investment_data.json'
+    path.write_text(json.dumps([]))
+    return path
+
+
+def test_time_is_zero_padded_so_formats_dedupe():
+    short = normalize_row(trade('2024-05-01', '9:05', 'MSFT', 'BUY', '2', '400'))
+    padded = normalize_row(trade('01-05-2024', '09:05:00', 'MSFT', 'BUY', '2', '400'))
+
+    assert short['Time'] == '09:05'
+    assert row_key(short) == row_key(padded)
+
+
+def test_reimport_skips_duplicates(tmp_path, ledger_json):
+    rows = [trade('2024-05-01', '10:00', 'MSFT', 'BUY', '2', '400')]
+    store = LedgerStore(tmp_path / 'store', ledger_json)
+
+    assert store.ingest(rows) == (1, 0, 0)
+    assert LedgerStore(tmp_path / 'store', ledger_json).ingest(rows) == (0, 1, 0)
+    assert len(list_chunks(tmp_path / 'store')) == 1
+
+
+def test_rows_older_than_stored_trades_are_rejected(tmp_path, ledger_json):
+    store = LedgerStore(tmp_path / 'store', ledger_json)
+    store.ingest([trade('2024-05-01', '10:00', 'MSFT', 'BUY', '2', '400')])
+
+    added, skipped, rejected = store.ingest([
+        trade('2024-04-01', '10:00', 'MSFT', 'BUY', '1', '300'),
+        trade('2024-04-01', '10:00', 'AAPL', 'BUY', '1', '150'),
+    ])
+    assert (added, skipped, rejected) == (1, 0, 1)
+    assert store.state['average_costs']['MSFT'] == 400
+
+
+def test_rows_added_to_json_later_are_indexed(tmp_path, ledger_json):
+    store = LedgerStore(tmp_path / 'store', ledger_json)
+    store.ingest([trade('2024-05-01', '10:00', 'MSFT', 'BUY', '2', '400')])
+
+    hand_added = {
+        'Transaction Type': 'BUY', 'Date': '01-04-2024', 'Time': '10:00', 'Ticker Symbol': 'MSFT',
+        'No. of Shares': '2', 'Price per Share USD': '$300.00', 'Image Filename': 'IMG_9999.PNG',
+        'Transaction Valuation USD': 600.0, 'Overall Holdings': 2.0, 'Average Cost per Share USD': 300.0,
+        'Realized Gain/Loss USD': 0, 'Portfolio Valuation USD': 600.0,
+    }
+    ledger_json.write_text(json.dumps([hand_added]))
+
+    store = LedgerStore(tmp_path / 'store', ledger_json)
+    assert store.ingest([trade('2024-04-01', '10:00', 'MSFT', 'BUY', '2', '300')]) == (0, 1, 0)
+    # State is rebuilt in trade order across the JSON and stored chunks
+    assert store.state['holdings']['MSFT'] == 4
+    assert store.state['average_costs']['MSFT'] == 350
+
+
+def test_hand_added_rows_merge_into_chunks_in_trade_order(tmp_path, ledger_json):
+    store = LedgerStore(tmp_path / 'store', ledger_json)
+    store.ingest([
+        trade('2024-05-01', '10:00', 'MSFT', 'BUY', '2', '400'),
+        trade('2024-06-01', '10:00', 'MSFT', 'SELL', '1', '500'),
+    ], chunk_rows=1)
+    assert len(list_chunks(tmp_path / 'store')) == 2
+
+    # A buy before the stored sell changes the average cost the sell was made at
+    hand_added = {
+        'Transaction Type': 'BUY', 'Date': '15-05-2024', 'Time': '10:00', 'Ticker Symbol': 'MSFT',
+        'No. of Shares': '2', 'Price per Share USD': '$300.00',
+    }
+    ledger_json.write_text(json.dumps([hand_added]))
+
+    store = LedgerStore(tmp_path / 'store', ledger_json)
+    assert store.state['holdings']['MSFT'] == 3
+    assert store.state['average_costs']['MSFT'] == 350
+    assert store.state['last_trades']['MSFT'] == '2024-06-01 10:00'
+
+
+def test_legacy_text_index_is_imported(tmp_path, ledger_json):
+    row = trade('2024-05-01', '10:00', 'MSFT', 'BUY', '2', '400')
+    (tmp_path / 'store').mkdir()
+    (tmp_path / 'store' / 'index.txt').write_text(row_key(normalize_row(row)) + '\n')
+
+    store = LedgerStore(tmp_path / 'store', ledger_json)
+    assert store.ingest([row]) == (0, 1, 0)
+    assert not (tmp_path / 'store' / 'index.txt').exists()
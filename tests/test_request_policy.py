@@ -0,0 +1,168 @@
+import time
+
+import pytest
+
+from request_policy import CircuitBreaker, FakeProvider, RequestPolicy, UpstreamUnavailable
+
+
+def make_policy(provider, **kwargs):
+    kwargs.setdefault('call_timeout', 0.1)
+    kwargs.setdefault('page_budget', 5.0)
+    return RequestPolicy(provider=provider, **kwargs)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.01)
+
+
+def test_slow_call_times_out_to_fallback():
+    policy = make_policy(FakeProvider(prices={'AAPL': 100}, latency=0.5))
+
+    started = time.monotonic()
+    assert policy.last_close('AAPL', fallback=90) == 90
+    assert time.monotonic() - started < 0.3
+
+
+def test_slow_call_without_fallback_raises():
+    policy = make_policy(FakeProvider(prices={'AAPL': 100}, latency=0.5))
+
+    with pytest.raises(UpstreamUnavailable):
+        policy.last_close('AAPL')
+
+
+def test_late_result_warms_cache():
+    policy = make_policy(FakeProvider(prices={'AAPL': 100}, latency=0.2))
+
+    assert policy.last_close('AAPL', fallback=90) == 90
+    wait_for(lambda: policy.cached(('close', 'AAPL')) is not None)
+    assert policy.last_close('AAPL', fallback=90) == 100
+
+
+def test_exhausted_page_budget_skips_upstream():
+    provider = FakeProvider(prices={'AAPL': 100})
+    policy = make_policy(provider)
+    policy.start_page(0)
+
+    assert policy.last_close('AAPL', fallback=90) == 90
+    assert provider.calls == 0
+
+
+def test_fetch_many_runs_calls_concurrently():
+    provider = FakeProvider(prices={'AAPL': 100, 'MSFT': 200, 'NVDA': 300}, latency=0.1)
+    policy = make_policy(provider, call_timeout=1.0)
+
+    started = time.monotonic()
+    prices = policy.last_closes(['AAPL', 'MSFT', 'NVDA'])
+    assert prices == {'AAPL': 100, 'MSFT': 200, 'NVDA': 300}
+    assert time.monotonic() - started < 0.25
+
+
+def test_timed_out_call_that_later_fails_counts_once():
+    provider = FakeProvider(prices={'AAPL': 100}, latency=0.2, fail=True)
+    policy = make_policy(provider, breaker=CircuitBreaker(failure_threshold=5))
+
+    policy.last_close('AAPL', fallback=90)
+    wait_for(lambda: not policy._in_flight)
+    assert policy.breaker.failures == 1
+
+
+def test_each_timed_out_call_in_a_batch_counts():
+    provider = FakeProvider(prices={'AAPL': 100, 'MSFT': 200}, latency=0.3)
+    policy = make_policy(provider, breaker=CircuitBreaker(failure_threshold=5))
+
+    policy.last_closes(['AAPL', 'MSFT'])
+    assert policy.breaker.failures == 2
+
+
+def test_breaker_opens_after_repeated_failures():
+    provider = FakeProvider(prices={'AAPL': 100}, fail=True)
+    policy = make_policy(provider, breaker=CircuitBreaker(failure_threshold=2, reset_after=60))
+
+    for ticker in ['AAPL', 'MSFT']:
+        with pytest.raises(UpstreamUnavailable):
+            policy.last_close(ticker)
+    assert policy.breaker.is_open
+
+    calls = provider.calls
+    assert policy.last_close('NVDA', fallback=1.0) == 1.0
+    assert provider.calls == calls
+
+
+def test_breaker_half_open_allows_one_trial_then_closes():
+    provider = FakeProvider(prices={'AAPL': 100}, fail=True)
+    policy = make_policy(provider, breaker=CircuitBreaker(failure_threshold=1, reset_after=0.1))
+
+    with pytest.raises(UpstreamUnavailable):
+        policy.last_close('AAPL')
+    assert policy.breaker.is_open
+
+    time.sleep(0.15)
+    assert policy.breaker.allow()
+    # Only one trial is let through while half-open
+    assert not policy.breaker.allow()
+
+    time.sleep(0.15)
+    provider.fail = False
+    assert policy.last_close('AAPL') == 100
+    assert not policy.breaker.is_open
+
+
+def test_stale_value_served_immediately_and_refreshed_in_background():
+    provider = FakeProvider(prices={'AAPL': 100})
+    policy = make_policy(provider, fresh_for=0.05)
+    assert policy.last_close('AAPL') == 100
+
+    time.sleep(0.1)
+    provider.prices['AAPL'] = 120
+    provider.latency = 0.2
+
+    started = time.monotonic()
+    assert policy.last_close('AAPL') == 100
+    assert time.monotonic() - started < 0.1
+
+    wait_for(lambda: policy.cached(('close', 'AAPL')) == 120)
+    assert policy.last_close('AAPL') == 120
+
+
+def test_page_budget_is_per_thread():
+    import threading
+
+    policy = make_policy(FakeProvider(prices={'AAPL': 100}))
+    policy.start_page(0)
+
+    other = threading.Thread(target=policy.start_page, args=(10,))
+    other.start()
+    other.join()
+
+    assert policy.budget.remaining() == 0
+
+
+def test_call_that_finishes_before_callback_is_attached_does_not_deadlock():
+    import threading
+
+    policy = make_policy(FakeProvider(prices={'AAPL': 100}), call_timeout=1.0)
+    results = []
+    for _ in range(50):
+        worker = threading.Thread(target=lambda: results.append(policy.last_closes(['AAPL', 'MSFT'])))
+        worker.start()
+        worker.join(timeout=2)
+        assert not worker.is_alive()
+        policy._cache.clear()
+
+
+def test_calls_queued_behind_busy_workers_are_not_failures():
+    tickers = [f'T{i}' for i in range(30)]
+    provider = FakeProvider(prices={ticker: 1.0 for ticker in tickers}, latency=0.5)
+    policy = make_policy(provider, call_timeout=1.2, max_workers=8)
+
+    policy.last_closes(tickers)
+    assert policy.breaker.failures == 0
+    assert not policy.breaker.is_open
+
+    # The calls that missed the deadline still complete and warm the cache
+    wait_for(lambda: all(policy.cached(('close', t)) is not None for t in tickers), timeout=3.0)
+    assert policy.breaker.failures == 0
@@ -1,19 +1,16 @@
-import time
-import yfinance as yf
-import streamlit as st
+from request_policy import policy
 
-@st.cache_data
 def get_ticker_to_name(tickers):
-    ticker_to_name = {}
-    for ticker in tickers:
-        ticker_obj = yf.Ticker(ticker)
-        company_name = ticker  # Default to ticker symbol
-        try:
-            info = ticker_obj.info
-            if info and 'longName' in info:
-                company_name = info['longName']
-            time.sleep(0.1)  # To prevent hitting the API rate limit
-        except Exception as e:
-            st.error(f"Failed to retrieve info for {ticker}: {e}")
-        ticker_to_name[ticker] = company_name
-    return ticker_to_name
\ No newline at end of file
+    # Cached by the request policy, which only keeps real names; the ticker symbol
+    # is used as a fallback when Yahoo is slow or unavailable and retried next run
+    return policy.long_names(tickers)
+
+def get_stock_category(ticker):
+    """Category used to group holdings in the charts and pick their sector benchmark."""
+    if ticker == 'VUAG.L':
+        return 'S&P 500'
+    if ticker in ['PLTR', 'AAPL', 'MSFT', 'META', 'AMZN', 'GOOG', 'NVDA', 'ZS', 'CRWD', 'INTC', 'ORCL', 'DELL', 'IBM']:
+        return 'Tech'
+    if ticker == 'BLK':
+        return 'Finance'
+    return 'Other'
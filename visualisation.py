@@ -1,12 +1,14 @@
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
-import yfinance as yf
 import pandas as pd
 import re
+from datetime import datetime
 
-from utils import get_ticker_to_name
+from utils import get_ticker_to_name, get_stock_category
 from stock_data import get_stock_history
+from financial_calculations import fallback_prices
+from request_policy import policy, UpstreamUnavailable
 
 def display_overall_holdings(total_current_value, total_invested_amount, total_profit_loss):
     """Display overall holdings at the top."""
@@ -26,12 +28,7 @@ def create_pie_chart(holdings_df):
     """Create and display a sunburst chart with stock categories and individual holdings."""
     
     # Add a new column for the stock categories (if not already added)
-    holdings_df['Category'] = holdings_df['Ticker'].apply(lambda ticker: 
-        'S&P 500' if ticker == 'VUAG.L' else
-        'Tech' if ticker in ['PLTR', 'AAPL', 'MSFT', 'META', 'AMZN', 'GOOG', 'NVDA', 'ZS', 'CRWD', 'INTC', 'ORCL', 'DELL', 'IBM'] else
-        'Finance' if ticker == 'BLK' else
-        'Other'
-    )
+    holdings_df['Category'] = holdings_df['Ticker'].apply(get_stock_category)
 
     # Define custom colors for the categories
     category_colors = {
@@ -63,8 +60,48 @@ def create_pie_chart(holdings_df):
     st.plotly_chart(fig)
 
 
-    
-def display_stock_details(holdings, transactions_df):
+@st.fragment
+def display_holdings_as_of(holdings_index):
+    """Display portfolio holdings and value on a date chosen with a slider."""
+    # Runs as a fragment, so moving the slider only re-queries the precomputed index
+    # and fetches closes for tickers held on the chosen date that aren't loaded yet.
+    # A slider-only rerun is a render of its own, so it gets a fresh latency budget.
+    if not st.session_state.get('rendering_page'):
+        policy.start_page()
+    start_date = holdings_index.start_date.date()
+    end_date = datetime.now().date()
+    selected_date = st.slider('Portfolio as of', min_value=start_date, max_value=end_date,
+                              value=end_date, format="DD-MM-YYYY")
+
+    holdings_index.load_closes(policy, holdings_index.holdings_at(selected_date)['Ticker'])
+    valuation_df = holdings_index.valuation_at(selected_date)
+
+    st.markdown(f"### Portfolio as of {selected_date:%d-%m-%Y}")
+
+    # Total only over priced holdings, so value and amount invested cover the same positions
+    unpriced = valuation_df['Price per Share'].isna()
+    if unpriced.any():
+        st.warning(f"No price available for {', '.join(valuation_df.loc[unpriced, 'Ticker'])}; "
+                   "they are excluded from the totals below.")
+    priced_df = valuation_df[~unpriced]
+    total_value = priced_df['Value'].sum()
+    total_invested = priced_df['Amount Invested'].sum()
+    display_overall_holdings(total_value, total_invested, total_value - total_invested)
+
+    st.dataframe(
+        valuation_df.sort_values('Value', ascending=False),
+        hide_index=True,
+        column_config={
+            'Shares': st.column_config.NumberColumn(format="%.4f"),
+            'Amount Invested': st.column_config.NumberColumn(format="$%.2f"),
+            'Price per Share': st.column_config.NumberColumn(format="$%.2f"),
+            'Value': st.column_config.NumberColumn(format="$%.2f"),
+            'Profit/Loss': st.column_config.NumberColumn(format="$%.2f"),
+        },
+    )
+
+
+def display_stock_details(holdings, transactions_df, benchmark_df=None):
     """Display detailed holdings and graphs for the selected stock."""
     # Map tickers to company names
     tickers = list(holdings.keys())
@@ -77,18 +114,28 @@ def display_stock_details(holdings, transactions_df):
     
     transactions_data = transactions_df.to_dict('records')
 
+    # Benchmark comparison for the selected stock over the same cash flows
+    if benchmark_df is not None and selected_stock in benchmark_df.index:
+        benchmark = benchmark_df.loc[selected_stock]
+    else:
+        benchmark = None
+
     # Get the stock history
-    historical_df, investment_score = get_stock_history(selected_stock, transactions_data)
+    stock_history = get_stock_history(selected_stock, transactions_data, benchmark)
+    if stock_history is not None:
+        historical_df, investment_score = stock_history
+    else:
+        # History unavailable (e.g. Yahoo slow or circuit open); show what we can without it
+        historical_df, investment_score = None, None
 
     # Calculate additional stats
     # Get number of shares held
     shares_held = holdings.get(selected_stock, 0)
 
     # Get current price
-    ticker_obj = yf.Ticker(selected_stock)
     try:
-        current_price = ticker_obj.history(period='1d')['Close'][0]
-    except Exception as e:
+        current_price = policy.last_close(selected_stock, fallback=fallback_prices.get(selected_stock))
+    except UpstreamUnavailable:
         current_price = None
 
     if current_price is not None:
@@ -156,6 +203,19 @@ def display_stock_details(holdings, transactions_df):
         </div>
     """, unsafe_allow_html=True)
 
+    # Benchmark comparison over the same cash flows
+    if benchmark is not None and not pd.isna(benchmark['Excess Return %']):
+        col7, col8, col9 = st.columns(3)
+        col7.metric("Benchmark", benchmark['Benchmark'], help=benchmark['Benchmark Name'])
+        col8.metric("Benchmark Return", f"{benchmark['Benchmark Return %']:.2f}%",
+                    help="Money-weighted price return had the same buys and sells gone into the benchmark on the "
+                         "same dates: gain over the average capital invested since the first trade "
+                         f"(${benchmark['Average Capital']:,.2f}). Dividends are excluded on both sides.")
+        col9.metric("Excess Return", f"{benchmark['Excess Return %']:.2f}%", f"{benchmark['Excess Return %']:.2f}%",
+                    help="Holding's money-weighted price return minus the benchmark's, on the same average "
+                         "capital. Unlike the profit/loss above, it includes gains on shares already sold. "
+                         "Dividends are shown separately.")
+
     # Plot the graph
     if historical_df is not None and not historical_df.empty:
         # Plot Value of Holdings and Value Invested over time on the same y-axis
@@ -177,6 +237,15 @@ def display_stock_details(holdings, transactions_df):
             line=dict(color='#FDE311')
         ))
 
+        # Add "Value incl. Dividends" line when the holding has paid dividends
+        if historical_df['Dividends Received'].iloc[-1] > 0:
+            fig.add_trace(go.Scatter(
+                x=historical_df['Date'],
+                y=historical_df['Total Return Value'],
+                name='Value incl. Dividends',
+                line=dict(color='#FDE311', dash='dot')
+            ))
+
         # Update layout without dual y-axes
         fig.update_layout(
             xaxis_title='Date',
@@ -188,6 +257,9 @@ def display_stock_details(holdings, transactions_df):
     else:
         st.warning("No historical data available to display.")
 
+    if investment_score is None:
+        return "Assessment unavailable while price history can't be retrieved.", None
+
     # Use regex to match either "Score: <number>" or just "<number>"
     match = re.search(r'(?:Score:\s*)?(100|[1-9]?\d)', investment_score, re.IGNORECASE)
     
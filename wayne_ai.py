@@ -1,5 +1,6 @@
 from openai import OpenAI
-import yfinance as yf
+
+from request_policy import policy
 
 import streamlit as st
 
@@ -20,7 +21,7 @@ def get_answer(prompt, info):
 
 def score_investment(investment_data):
     prompt = f"""
-    Based on the grading criteria below, evaluate and provide a score for this stock investment on a scale of 0-100. Consider its performance relative to the broader market benchmarks, including the S&P 500's 5-Year Return of 93.01%, 1-Year Return of 25.31%, sector performance, and prevailing market conditions.
+    Based on the grading criteria below, evaluate and provide a score for this stock investment on a scale of 0-100. Consider its performance relative to the broader market benchmarks, including the benchmark return over the same cash flows (where provided), sector performance, and prevailing market conditions.
 
     When scoring, account for factors such as:
     - **Sector performance**: How the stock compares within its industry.
@@ -46,8 +47,8 @@ def score_investment(investment_data):
     """
 
     # Fetch the company info using yfinance
-    ticker = yf.Ticker(investment_data['Stock Name'])
-    company_name = ticker.info.get('longName', 'Company name not available')
+    ticker = investment_data['Stock Name']
+    company_name = policy.long_name(ticker)
 
 
     # Dynamically construct the 'info' string using investment_data
@@ -55,10 +56,14 @@ def score_investment(investment_data):
     Stock Name: {company_name}({ticker}),
     Current Stock Price: {investment_data['Current Stock Price']},
     Average Price Paid per Share: {investment_data['Average Price Paid per Share']},
-    Percentage Change Since Investment: {investment_data['Percentage Change Since Investment']},
+    Percentage Change Since Investment (price only, excludes dividends): {investment_data['Percentage Change Since Investment']},
     Held Current amount of shares for: {investment_data['Held current amount for']},
     Shares Held: {investment_data['Shares Held']},
-    Total Value Invested: {investment_data['Total Value Invested']}
+    Total Value Invested: {investment_data['Total Value Invested']},
+    Dividends Received (not included in any return figure): {investment_data.get('Dividends Received', '$0.00')},
+    Benchmark: {investment_data.get('Benchmark', 'Not available')},
+    Benchmark Money-Weighted Price Return Over Same Cash Flows (excludes dividends): {investment_data.get('Benchmark Return Over Same Cash Flows', 'Not available')},
+    Excess Money-Weighted Price Return vs Benchmark (both sides exclude dividends): {investment_data.get('Excess Return vs Benchmark', 'Not available')}
     
     ### provide an exact integer grade from 0-100 followed by an explanation of why the investment falls within that range. Grade must not be a multiple of 10.
     Grade: """